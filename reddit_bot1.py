@@ -1,13 +1,22 @@
+import asyncio
 import praw
-import requests
-import schedule
+import httpx
+import orjson
 import time
 import logging
-from datetime import datetime
-import pytz
+import math
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
 from urllib3.exceptions import NameResolutionError
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
+import queue
+import random
+import re
+import signal
+import sys
+import threading
 
 # Create logs directory if it doesn't exist
 os.makedirs('logs', exist_ok=True)
@@ -23,12 +32,19 @@ log_handler.setFormatter(log_formatter)
 
 logger = logging.getLogger('RedditBot')
 logger.setLevel(logging.INFO)
-logger.addHandler(log_handler)
 
 # Add console handler for immediate feedback
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(log_formatter)
-logger.addHandler(console_handler)
+
+# Log calls only enqueue records; file and console output happen on a background thread
+log_queue = queue.Queue(-1)
+logger.addHandler(QueueHandler(log_queue))
+log_listener = QueueListener(log_queue, log_handler, console_handler, respect_handler_level=True)
+log_listener.start()
+
+# Level is fixed at startup, so check it once for the long-running main loop
+_LOG_INFO_ON = logger.isEnabledFor(logging.INFO)
 
 import os
 from dotenv import load_dotenv
@@ -36,57 +52,20 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-class Config:
-    # Reddit API credentials
-    REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID")
-    REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET")
-    REDDIT_USERNAME = os.getenv("REDDIT_USERNAME")
-    REDDIT_PASSWORD = os.getenv("REDDIT_PASSWORD")
-    USER_AGENT = os.getenv("USER_AGENT")
-
-    # Groq AI API credentials
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
-    # Subreddit configuration
-    POST_SUBREDDIT = "test"
-    COMMENT_SUBREDDIT = "learnmachinelearning"
-
-    # Schedule configuration
-    POST_SCHEDULE = "10:00"
-    COMMENT_SCHEDULE = "12:00"
-
-
-class RedditBot:
-    def __init__(self):
-        self.config = Config()
-        self.reddit = None
-        self.last_action_time = datetime.now()
-        self.setup_reddit()
-
-    def setup_reddit(self):
-        """Initialize Reddit API connection"""
-        try:
-            self.reddit = praw.Reddit(
-                client_id=self.config.REDDIT_CLIENT_ID,
-                client_secret=self.config.REDDIT_CLIENT_SECRET,
-                user_agent=self.config.USER_AGENT,
-                username=self.config.REDDIT_USERNAME,
-                password=self.config.REDDIT_PASSWORD
-            )
-            # Verify authentication
-            username = self.reddit.user.me()
-            logger.info(f"Reddit authentication successful - logged in as {username}")
-            return True
-        except Exception as e:
-            logger.error(f"Reddit authentication failed: {e}")
-            raise
-
-    def generate_fallback_content(self, content_type="post", post_title=None):
-        """Generate meaningful fallback content when AI is unavailable"""
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        if content_type == "post":
-            return f"""
+# Groq AI endpoint
+GROQ_API_URL = "https://api.groq.ai/generate"
+# Responses are capped at 150 tokens; anything larger than this is rejected
+GROQ_MAX_RESPONSE_BYTES = 64 * 1024
+GROQ_TIMEOUT = httpx.Timeout(10.0, connect=3.05)
+# Retry transient failures with exponential backoff, honouring Retry-After on 429/503
+GROQ_RETRY_TOTAL = 3
+GROQ_BACKOFF_FACTOR = 1.0
+GROQ_BACKOFF_JITTER = 0.5
+GROQ_BACKOFF_MAX = 120
+GROQ_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Fallback templates used when AI generation is unavailable
+_POST_FALLBACK_TMPL = """
 # Today's AI and Technology Update
 
 Hey Reddit community! 👋
@@ -103,29 +82,20 @@ Here's what's happening in the world of AI and technology:
 * What topics would you like to see covered in future posts?
 
 ---
-*This is an automated post. Generated at: {current_time}*
+*This is an automated post. Generated at: {ts}*
             """
-        else:  # comment fallback
-            # Create context-aware comment based on post title
-            if post_title:
-                return self.generate_contextual_comment(post_title)
-            return f"""
+
+_COMMENT_FALLBACK_TMPL = """
 Thank you for sharing this interesting perspective! 
 
 The intersection of technology and learning is fascinating, and discussions like these help us all grow and understand better.
 
 Would love to hear more about your experiences and thoughts on this topic.
 
-*Comment generated at: {current_time}*
+*Comment generated at: {ts}*
             """
 
-    def generate_contextual_comment(self, post_title):
-        """Generate a context-aware comment based on post title"""
-        title_lower = post_title.lower()
-        
-        # Dictionary of topic-based responses
-        responses = {
-            'learn': """
+_LEARN_RESP = """
 Great learning resource! Education in technology is crucial for staying current in our rapidly evolving field.
 
 Some additional resources that might be helpful:
@@ -134,8 +104,9 @@ Some additional resources that might be helpful:
 - Community forums for peer learning
 
 Keep up the great work! What learning resources have you found most helpful?
-            """,
-            'help': """
+            """
+
+_HELP_RESP = """
 Thanks for reaching out to the community! While I'm an automated response, the community here is very supportive.
 
 Some general tips:
@@ -145,8 +116,9 @@ Some general tips:
 - Search for similar issues in the community
 
 Hope this helps point you in the right direction!
-            """,
-            'project': """
+            """
+
+_PROJECT_RESP = """
 Exciting project! Building practical applications is one of the best ways to learn and grow in this field.
 
 Some suggestions for project development:
@@ -157,49 +129,250 @@ Some suggestions for project development:
 
 Looking forward to seeing how your project develops!
             """
-        }
-        
-        # Find the most relevant response based on post title
-        for keyword, response in responses.items():
-            if keyword in title_lower:
-                return response
-                
-        # Default response if no keywords match
-        return f"""
+
+_DEFAULT_RESP = """
 Thanks for sharing this interesting topic! 
 
 These kinds of discussions are valuable for the community and help us all learn from each other's experiences.
 
 Looking forward to seeing more perspectives in this thread.
 
-*Generated at: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}*
+*Generated at: {ts}*
         """
 
-    def generate_content(self, prompt, retries=3, delay=5):
+
+class ContentType(IntEnum):
+    """Kind of content being generated; doubles as an index into _FALLBACKS"""
+    POST = 0
+    COMMENT = 1
+
+
+# Generic fallback template per ContentType
+_FALLBACKS = (_POST_FALLBACK_TMPL, _COMMENT_FALLBACK_TMPL)
+
+# Topic keyword -> contextual comment
+_CTX_RESPONSES = {
+    'learn': _LEARN_RESP,
+    'help': _HELP_RESP,
+    'project': _PROJECT_RESP
+}
+# Single compiled alternation over the keywords, scanned in one pass
+_KW_RE = re.compile("(" + "|".join(map(re.escape, _CTX_RESPONSES)) + ")", re.IGNORECASE)
+
+def _now_str():
+    """Return the current local time as 'YYYY-MM-DD HH:MM:SS'"""
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _retry_delay(attempt, retry_after=None):
+    """Seconds to wait before retrying a Groq request, or None if Retry-After is too long"""
+    if retry_after:
+        delay = None
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                when = None
+            if when is not None:
+                # A date in the past means the request may be retried right away
+                delay = max(0.0, (when - datetime.now(when.tzinfo)).total_seconds())
+        # Waits beyond the cap (including inf) give up; nan or negative values are ignored
+        if delay is not None and delay > GROQ_BACKOFF_MAX:
+            return None
+        if delay is not None and math.isfinite(delay) and delay >= 0:
+            return delay
+    backoff = GROQ_BACKOFF_FACTOR * 2 ** attempt + random.uniform(0, GROQ_BACKOFF_JITTER)
+    return min(GROQ_BACKOFF_MAX, backoff)
+
+
+def _parse_hhmm(value):
+    """Parse a 'HH:MM' schedule string into an (hour, minute) tuple"""
+    hour, minute = value.split(":")
+    return int(hour), int(minute)
+
+
+def _next_occurrence(hhmm, after):
+    """Return the first datetime strictly after `after` that falls on hhmm"""
+    hour, minute = hhmm
+    candidate = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= after:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+class Config:
+    # Reddit API credentials
+    REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID")
+    REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET")
+    REDDIT_USERNAME = os.getenv("REDDIT_USERNAME")
+    REDDIT_PASSWORD = os.getenv("REDDIT_PASSWORD")
+    USER_AGENT = os.getenv("USER_AGENT")
+
+    # Groq AI API credentials
+    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+
+    # Subreddit configuration
+    POST_SUBREDDIT = "test"
+    COMMENT_SUBREDDIT = "learnmachinelearning"
+
+    # Schedule configuration
+    POST_SCHEDULE = "10:00"
+    COMMENT_SCHEDULE = "12:00"
+
+
+class RedditBot:
+    def __init__(self):
+        self.config = Config()
+        self.reddit = None
+        self.post_sub = None
+        self.comment_sub = None
+        self.last_action_time = datetime.now()
+        self._stop = threading.Event()
+        self.groq_headers = {}
+        self.setup_http()
+        self.setup_reddit()
+
+    def setup_http(self):
+        """Set the Groq AI request headers once for the HTTP client"""
+        self.groq_headers = {
+            "Authorization": f"Bearer {self.config.GROQ_API_KEY}",
+            "Content-Type": "application/json",
+            "User-Agent": self.config.USER_AGENT
+        }
+
+    def setup_reddit(self):
+        """Initialize Reddit API connection"""
+        try:
+            self.reddit = praw.Reddit(
+                client_id=self.config.REDDIT_CLIENT_ID,
+                client_secret=self.config.REDDIT_CLIENT_SECRET,
+                user_agent=self.config.USER_AGENT,
+                username=self.config.REDDIT_USERNAME,
+                password=self.config.REDDIT_PASSWORD,
+                # Let PRAW wait out Reddit's rate limits instead of sleeping by hand
+                ratelimit_seconds=300
+            )
+            # Verify authentication
+            username = self.reddit.user.me()
+            logger.info(f"Reddit authentication successful - logged in as {username}")
+            # Subreddit handles are reused by every scheduled run
+            self.post_sub = self.reddit.subreddit(self.config.POST_SUBREDDIT)
+            self.comment_sub = self.reddit.subreddit(self.config.COMMENT_SUBREDDIT)
+            return True
+        except Exception as e:
+            logger.error(f"Reddit authentication failed: {e}")
+            raise
+
+    def generate_fallback_content(self, content_type=ContentType.POST, post_title=None):
+        """Generate meaningful fallback content when AI is unavailable"""
+        # Create context-aware comment based on post title
+        if content_type == ContentType.COMMENT and post_title:
+            return self.generate_contextual_comment(post_title)
+        return _FALLBACKS[content_type].format(ts=_now_str())
+
+    def generate_contextual_comment(self, post_title):
+        """Generate a context-aware comment based on post title"""
+        match = _KW_RE.search(post_title)
+        if match:
+            return _CTX_RESPONSES[match.group(1).lower()]
+
+        # Default response if no keywords match
+        return _DEFAULT_RESP.format(ts=_now_str())
+
+    def generate_content(self, prompt, content_type, post_title=None):
         """Generate content using Groq AI with retry mechanism and fallback"""
-        for attempt in range(retries):
+        return self.generate_contents([(prompt, content_type, post_title)])[0]
+
+    def generate_contents(self, jobs):
+        """Generate content for several (prompt, content_type, post_title) jobs concurrently"""
+        return asyncio.run(self._agenerate_all(jobs))
+
+    async def _apost_groq(self, client, prompt):
+        """Send one Groq AI request and return the size-capped response body"""
+        body = b""
+        async with client.stream(
+            "POST",
+            GROQ_API_URL,
+            content=orjson.dumps({"prompt": prompt, "max_tokens": 150})
+        ) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) > GROQ_MAX_RESPONSE_BYTES:
+                    raise ValueError("Groq response exceeded size limit")
+        return body
+
+    async def _agenerate(self, client, prompt, content_type, post_title=None):
+        """Generate content using Groq AI without blocking other generations"""
+        for attempt in range(GROQ_RETRY_TOTAL + 1):
             try:
-                response = requests.post(
-                    "https://api.groq.ai/generate",
-                    json={"prompt": prompt, "max_tokens": 150},
-                    headers={"Authorization": f"Bearer {self.config.GROQ_API_KEY}"}
-                )
-                response.raise_for_status()
-                content = response.json().get("content", "")
-                if content:
+                body = await self._apost_groq(client, prompt)
+                parsed = orjson.loads(body)
+                # Anything but a JSON object with a non-empty string "content" is a failure
+                content = parsed.get("content") if isinstance(parsed, dict) else None
+                if isinstance(content, str) and content:
                     logger.info("Content generation successful")
                     return content
+                logger.warning("Content generation returned no usable content")
+                break
+            except httpx.HTTPStatusError as e:
+                # Only rate limiting and server errors are worth retrying
+                if e.response.status_code not in GROQ_RETRY_STATUSES or attempt == GROQ_RETRY_TOTAL:
+                    logger.warning(f"Content generation failed: {e}")
+                    break
+                delay = _retry_delay(attempt, e.response.headers.get("Retry-After"))
+                if delay is None:
+                    logger.warning(f"Content generation failed, Retry-After exceeds {GROQ_BACKOFF_MAX}s: {e}")
+                    break
+                logger.warning(f"Content generation attempt {attempt + 1} failed, retrying in {delay:.1f}s: {e}")
+            except httpx.TransportError as e:
+                if attempt == GROQ_RETRY_TOTAL:
+                    logger.warning(f"Content generation failed after retries: {e}")
+                    break
+                delay = _retry_delay(attempt)
+                logger.warning(f"Content generation attempt {attempt + 1} failed, retrying in {delay:.1f}s: {e}")
+            except ValueError as e:
+                logger.warning(f"Content generation failed: {e}")
+                break
+            except httpx.HTTPError as e:
+                # Decoding errors, redirect loops and the like will not fix themselves
+                logger.warning(f"Content generation failed: {e}")
+                break
             except Exception as e:
-                logger.warning(f"Content generation attempt {attempt + 1} failed: {e}")
-                if attempt < retries - 1:
-                    time.sleep(delay)
-        
+                logger.warning(f"Content generation failed unexpectedly: {e}")
+                break
+            await asyncio.sleep(delay)
+
         # If all attempts fail, use fallback content
-        content_type = "post" if "post" in prompt.lower() else "comment"
-        fallback = self.generate_fallback_content(content_type)
+        fallback = self.generate_fallback_content(content_type, post_title)
         logger.info("Using fallback content due to AI generation failure")
         return fallback
 
+    async def _agenerate_all(self, jobs):
+        """Run all generation jobs over one shared Groq AI client"""
+        async with httpx.AsyncClient(
+            headers=self.groq_headers,
+            timeout=GROQ_TIMEOUT,
+            limits=httpx.Limits(max_connections=20)
+        ) as client:
+            results = await asyncio.gather(
+                *[self._agenerate(client, *job) for job in jobs],
+                return_exceptions=True
+            )
+
+        # A failed job falls back on its own instead of discarding the whole batch
+        contents = []
+        for (prompt, content_type, *rest), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Content generation failed unexpectedly: {result}")
+                result = self.generate_fallback_content(content_type, *rest)
+            elif isinstance(result, BaseException):
+                raise result
+            contents.append(result)
+        return contents
+
     def test_connection(self):
         """Test all connections and permissions"""
         try:
@@ -209,13 +382,13 @@ Looking forward to seeing more perspectives in this thread.
             logger.info(f"Reddit connection test passed - user: {username}")
 
             # Test Groq AI connection
-            test_content = self.generate_content("Write a short test message.")
+            test_content = self.generate_content("Write a short test message.", content_type=ContentType.COMMENT)
             if test_content and len(test_content) > 0:
                 print("✓ Groq AI connection successful")
                 logger.info("Groq AI connection test passed")
             
             # Test posting permission
-            test_post = self.reddit.subreddit(self.config.POST_SUBREDDIT).submit(
+            test_post = self.post_sub.submit(
                 title="Test Post - Will Delete",
                 selftext="This is a test post to verify bot permissions."
             )
@@ -236,9 +409,12 @@ Looking forward to seeing more perspectives in this thread.
     def create_post(self):
         """Create a new Reddit post"""
         try:
-            content = self.generate_content("Write an engaging Reddit post about machine learning or AI technology.")
-            title = f"AI Insights & Discussion: {datetime.now().strftime('%Y-%m-%d')}"
-            post = self.reddit.subreddit(self.config.POST_SUBREDDIT).submit(
+            content = self.generate_content(
+                "Write an engaging Reddit post about machine learning or AI technology.",
+                content_type=ContentType.POST
+            )
+            title = f"AI Insights & Discussion: {time.strftime('%Y-%m-%d')}"
+            post = self.post_sub.submit(
                 title=title, 
                 selftext=content
             )
@@ -251,23 +427,33 @@ Looking forward to seeing more perspectives in this thread.
     def create_comments(self):
         """Create comments on recent posts"""
         try:
-            subreddit = self.reddit.subreddit(self.config.COMMENT_SUBREDDIT)
-            for post in subreddit.new(limit=3):
-                if not post.saved:
-                    prompt = f"Write a helpful comment for this post title: {post.title}"
-                    comment = self.generate_content(prompt)
-                    # Pass post title to generate contextual fallback content
-                    if "Unable to generate content" in comment:
-                        comment = self.generate_fallback_content("comment", post.title)
-                    reply = post.reply(comment)
-                    post.save()
-                    logger.info(f"Commented on post: {post.title}")
-                    print(f"✓ Created new comment on: {post.title}")
-                    time.sleep(5)  # Rate limiting
+            # `saved` comes with the listing data, so this check costs no extra requests
+            posts = [post for post in self.comment_sub.new(limit=3) if not post.saved]
+            # Groq calls overlap; replies stay sequential since PRAW is synchronous
+            comments = self.generate_contents([
+                (f"Write a helpful comment for this post title: {post.title}", ContentType.COMMENT, post.title)
+                for post in posts
+            ])
+            for post, comment in zip(posts, comments):
+                reply = post.reply(comment)
+                post.save()
+                logger.info(f"Commented on post: {post.title}")
+                print(f"✓ Created new comment on: {post.title}")
         except Exception as e:
             logger.error(f"Failed to create comments: {e}")
             print(f"✕ Failed to create comments: {e}")
 
+    def stop(self):
+        """Ask the main loop to exit without waiting for the next task"""
+        self._stop.set()
+
+    def _handle_stop_signal(self, signum, frame):
+        """Stop after the current task; a second signal gets the default handling"""
+        self.stop()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        print("\nStopping after the current task. Press Ctrl+C again to exit immediately.")
+
     def run(self):
         """Main run loop with scheduling"""
         print("\nRunning initial tests...")
@@ -276,9 +462,11 @@ Looking forward to seeing more perspectives in this thread.
             return
 
         print("\nSetting up schedule...")
-        schedule.every().day.at(self.config.POST_SCHEDULE).do(self.create_post)
-        schedule.every().day.at(self.config.COMMENT_SCHEDULE).do(self.create_comments)
-        
+        tasks = [
+            (_parse_hhmm(self.config.POST_SCHEDULE), self.create_post),
+            (_parse_hhmm(self.config.COMMENT_SCHEDULE), self.create_comments)
+        ]
+
         print(f"\nBot is running with the following schedule:")
         print(f"- Posts: Daily at {self.config.POST_SCHEDULE}")
         print(f"- Comments: Daily at {self.config.COMMENT_SCHEDULE}")
@@ -294,27 +482,41 @@ Looking forward to seeing more perspectives in this thread.
         print("\nBot is now running in continuous mode. Press Ctrl+C to stop.")
         print("Check logs/reddit_bot.log for detailed logs.\n")
 
-        # Main loop with better logging
-        last_log_time = datetime.now()
-        while True:
-            try:
-                schedule.run_pending()
-                
-                # Log status every 5 minutes
-                current_time = datetime.now()
-                if (current_time - last_log_time).seconds >= 300:
-                    logger.info("Bot is running normally. Waiting for next scheduled task.")
-                    print(".", end="", flush=True)  # Progress indicator
-                    last_log_time = current_time
-                
-                time.sleep(60)
-            except KeyboardInterrupt:
-                print("\nBot stopped by user")
-                logger.info("Bot stopped by user")
-                break
-            except Exception as e:
-                logger.error(f"Error in main loop: {e}")
-                time.sleep(60)
+        # Main loop: sleep until the next scheduled task is due instead of polling
+        last_run = datetime.now()
+        show_progress = sys.stdout.isatty()
+        # The first Ctrl+C / SIGTERM wakes the loop instead of raising mid-sleep;
+        # a second one interrupts a running task
+        previous_handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGINT, signal.SIGTERM)}
+        signal.signal(signal.SIGINT, self._handle_stop_signal)
+        signal.signal(signal.SIGTERM, self._handle_stop_signal)
+        try:
+            while not self._stop.is_set():
+                try:
+                    last_run = max(last_run, datetime.now())
+                    upcoming = [(_next_occurrence(hhmm, last_run), fn) for hhmm, fn in tasks]
+                    next_run = min(when for when, _ in upcoming)
+                    if _LOG_INFO_ON:
+                        logger.info(f"Bot is running normally. Next scheduled task at {next_run}.")
+                    if show_progress:
+                        sys.stdout.write(".")  # Progress indicator
+                        sys.stdout.flush()
+
+                    if self._stop.wait(max(0, (next_run - datetime.now()).total_seconds())):
+                        break
+                    last_run = next_run
+                    for when, task in upcoming:
+                        if when == next_run:
+                            task()
+                except Exception as e:
+                    logger.error(f"Error in main loop: {e}")
+                    self._stop.wait(60)
+        finally:
+            for sig, handler in previous_handlers.items():
+                signal.signal(sig, handler)
+
+        print("\nBot stopped by user")
+        logger.info("Bot stopped by user")
 
 if __name__ == "__main__":
     try:
@@ -325,4 +527,7 @@ if __name__ == "__main__":
         logger.info("Bot stopped by user")
     except Exception as e:
         print(f"Critical error: {e}")
-        logger.critical(f"Critical error: {e}")
\ No newline at end of file
+        logger.critical(f"Critical error: {e}")
+    finally:
+        # Flush any queued log records before exiting
+        log_listener.stop()
\ No newline at end of file